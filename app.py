@@ -1,10 +1,23 @@
 """Flask web application for sportsbook odds comparison and EV analysis."""
 from __future__ import annotations
 
+import hashlib
 import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
 from typing import List, Optional, Sequence, Tuple
 
-from flask import Flask, flash, jsonify, render_template, request
+import orjson
+from flask import (
+    Flask,
+    Response,
+    flash,
+    get_flashed_messages,
+    render_template,
+    request,
+    stream_template,
+)
+from flask_compress import Compress
 
 from odds_ev import (
     SHARP_BOOKS,
@@ -19,6 +32,12 @@ from odds_ev import (
 
 app = Flask(__name__)
 app.config["SECRET_KEY"] = os.environ.get("FLASK_SECRET_KEY", "dev-secret-change-me")
+app.config["MAX_CONTENT_LENGTH"] = 10 * 1024 * 1024
+app.config["COMPRESS_ALGORITHM"] = ["br", "gzip"]
+app.config["COMPRESS_MIN_SIZE"] = 500
+# Compressors buffer output, which would hold back the streamed analysis page
+app.config["COMPRESS_STREAMS"] = False
+Compress(app)
 
 DEFAULT_SPORT_OPTIONS = [
     {"key": "americanfootball_nfl", "title": "American Football (NFL)"},
@@ -26,6 +45,17 @@ DEFAULT_SPORT_OPTIONS = [
     {"key": "baseball_mlb", "title": "Baseball (MLB)"},
 ]
 
+# Numeric form fields and the defaults used when they are blank or invalid
+NUMERIC_FIELDS = (("stake", 100.0), ("bankroll", 1000.0), ("fractional_kelly", 1.0))
+
+# Request threads per process (match gunicorn --threads); each request can have
+# up to three API calls in flight, so size the fetch pool to avoid cross-request queuing.
+REQUEST_THREADS = int(os.environ.get("ODDS_EV_THREADS", "1"))
+FETCHES_PER_REQUEST = 3
+
+# API calls are network-bound; run independent fetches side by side.
+executor = ThreadPoolExecutor(max_workers=max(4, REQUEST_THREADS * FETCHES_PER_REQUEST))
+
 
 def parse_manual_lines(form) -> Tuple[List[UserLine], List[str]]:
     names = form.getlist("line_name[]")
@@ -64,13 +94,61 @@ def prepare_line_inputs(lines: Sequence[UserLine]) -> List[dict]:
     ]
 
 
-def parse_float(value: Optional[str], default: float) -> float:
-    if value is None or value == "":
-        return default
+def empty_analysis() -> dict:
+    return {
+        "results": [],
+        "consensus": None,
+        "event_info": None,
+        "bookmaker_rows": [],
+        "messages": [],
+    }
+
+
+def run_analysis(
+    event_future: Future,
+    lines: Sequence[UserLine],
+    market: str,
+    stake: float,
+    bankroll: float,
+    fractional_kelly: float,
+) -> dict:
+    """Finish the odds analysis; called from the template once the form has streamed."""
+    analysis = empty_analysis()
     try:
-        return float(value)
-    except ValueError:
-        return default
+        event_info = event_future.result()
+        consensus_data = compute_sharp_consensus(event_info, market)
+        results, warnings = analyze_user_lines(
+            lines,
+            consensus_data,
+            stake=stake,
+            bankroll=bankroll,
+            fractional_kelly=fractional_kelly,
+        )
+    except Exception as exc:
+        analysis["messages"].append(("danger", f"Unable to analyze odds: {exc}"))
+        return analysis
+    analysis.update(
+        results=results,
+        consensus=consensus_data,
+        event_info=event_info,
+        bookmaker_rows=build_bookmaker_rows(consensus_data),
+        messages=[("warning", warning) for warning in warnings],
+    )
+    return analysis
+
+
+def parse_numeric_fields(form) -> List[float]:
+    values: List[float] = []
+    for name, default in NUMERIC_FIELDS:
+        try:
+            values.append(float(form.get(name) or default))
+        except ValueError:
+            values.append(default)
+    return values
+
+
+def json_response(payload: dict, status: int = 200) -> Response:
+    return Response(orjson.dumps(payload), status=status, mimetype="application/json")
 
 
 @app.route("/events", methods=["POST"])
@@ -79,11 +157,11 @@ def list_events():
     api_key = (payload.get("api_key") or "").strip()
     sport = (payload.get("sport") or "").strip()
     if not api_key or not sport:
-        return jsonify({"events": [], "error": "API key and sport are required"}), 400
+        return json_response({"events": [], "error": "API key and sport are required"}, 400)
     try:
         events = fetch_events(api_key, sport)
     except Exception as exc:  # pragma: no cover - API failure path
-        return jsonify({"events": [], "error": str(exc)}), 500
+        return json_response({"events": [], "error": str(exc)}, 500)
     event_options = [
         {
             "id": event.get("id"),
@@ -92,7 +170,16 @@ def list_events():
         }
         for event in events
     ]
-    return jsonify({"events": event_options})
+    body = orjson.dumps({"events": event_options})
+    # Weak validator so response compression does not rewrite it
+    etag = hashlib.blake2b(body, digest_size=8).hexdigest()
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype="application/json")
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = "private, max-age=30"
+    return response
 
 
 @app.route("/", methods=["GET", "POST"])
@@ -101,24 +188,25 @@ def index():
     sport = request.form.get("sport") or "americanfootball_nfl"
     event_id = request.form.get("event_id") or ""
     market = request.form.get("market") or "spreads"
-    stake = parse_float(request.form.get("stake"), 100.0)
-    bankroll = parse_float(request.form.get("bankroll"), 1000.0)
-    fractional_kelly = parse_float(request.form.get("fractional_kelly"), 1.0)
+    stake, bankroll, fractional_kelly = parse_numeric_fields(request.form)
     fractional_kelly = max(0.0, min(fractional_kelly, 1.0))
 
+    sports_future = executor.submit(fetch_sports, api_key) if api_key else None
+    events_future = executor.submit(fetch_events, api_key, sport) if api_key and sport else None
+
     sports: List[dict] = []
-    if api_key:
+    if sports_future is not None:
         try:
-            sports = fetch_sports(api_key)
+            sports = sports_future.result()
         except Exception as exc:
             flash(f"Unable to load sports list: {exc}", "warning")
     if not sports:
         sports = DEFAULT_SPORT_OPTIONS
 
     events = []
-    if api_key and sport:
+    if events_future is not None:
         try:
-            events = fetch_events(api_key, sport)
+            events = events_future.result()
         except Exception as exc:
             flash(f"Unable to load events for {sport}: {exc}", "warning")
 
@@ -129,11 +217,7 @@ def index():
     upload_lines: List[UserLine] = []
     recognized_text: Optional[str] = None
 
-    analysis_results = []
-    analysis_warnings: List[str] = []
-    consensus_data = None
-    event_info = None
-    bookmaker_rows = []
+    pending_analysis = None
 
     if request.method == "POST":
         if manual_lines:
@@ -141,9 +225,10 @@ def index():
         else:
             upload = request.files.get("lines_file")
             if upload and upload.filename:
-                data = upload.read()
                 try:
-                    upload_lines, recognized_text = parse_lines_from_upload(upload.filename, data)
+                    upload_lines, recognized_text = parse_lines_from_upload(
+                        upload.filename, upload.stream
+                    )
                 except Exception as exc:
                     flash(f"Could not parse uploaded file: {exc}", "danger")
                     upload_lines = []
@@ -158,22 +243,11 @@ def index():
         elif not event_id:
             flash("Select an event to analyze.", "danger")
         else:
-            try:
-                event_info = fetch_event_with_market(api_key, sport, event_id, market)
-                consensus_data = compute_sharp_consensus(event_info, market)
-                analysis_results, analysis_warnings = analyze_user_lines(
-                    lines_to_use,
-                    consensus_data,
-                    stake=stake,
-                    bankroll=bankroll,
-                    fractional_kelly=fractional_kelly,
-                )
-            except Exception as exc:
-                flash(f"Unable to analyze odds: {exc}", "danger")
-            else:
-                for warning in analysis_warnings:
-                    flash(warning, "warning")
-                bookmaker_rows = build_bookmaker_rows(consensus_data)
+            # Start the odds fetch now; the template waits on it after the form has been sent
+            event_future = executor.submit(fetch_event_with_market, api_key, sport, event_id, market)
+            pending_analysis = partial(
+                run_analysis, event_future, lines_to_use, market, stake, bankroll, fractional_kelly
+            )
 
     if manual_lines:
         line_inputs = prepare_line_inputs(manual_lines)
@@ -185,8 +259,7 @@ def index():
     if not line_inputs:
         line_inputs = [{"label": "", "odds": "", "point": ""} for _ in range(2)]
 
-    return render_template(
-        "index.html",
+    context = dict(
         api_key=api_key,
         sport=sport,
         sports=sports,
@@ -198,10 +271,15 @@ def index():
         fractional_kelly=fractional_kelly,
         line_inputs=line_inputs,
         recognized_text=recognized_text,
-        analysis_results=analysis_results,
-        consensus=consensus_data,
-        bookmaker_rows=bookmaker_rows,
-        event_info=event_info,
+    )
+    if pending_analysis is None:
+        return render_template("index.html", run_analysis=empty_analysis, **context)
+    # The session cookie is written before the stream runs, so pop flashes now
+    flashed = get_flashed_messages(with_categories=True)
+    return Response(
+        stream_template(
+            "index.html", run_analysis=pending_analysis, flashed_messages=flashed, **context
+        )
     )
 
 
@@ -216,8 +294,10 @@ def build_bookmaker_rows(consensus: Optional[dict]) -> List[dict]:
         market = entry.get("market", {}) or {}
         outcome_values = []
         available_outcomes = market.get("outcomes", []) or []
+        # Reversed so the first outcome wins when a book repeats a name
+        outcome_by_name = {o.get("name"): o for o in reversed(available_outcomes)}
         for name in outcome_names:
-            match = next((o for o in available_outcomes if o.get("name") == name), None)
+            match = outcome_by_name.get(name)
             if match:
                 outcome_values.append(
                     {
@@ -227,11 +307,12 @@ def build_bookmaker_rows(consensus: Optional[dict]) -> List[dict]:
                 )
             else:
                 outcome_values.append({"price": None, "point": None})
+        key = bookmaker.get("key")
         rows.append(
             {
-                "title": bookmaker.get("title") or bookmaker.get("key"),
-                "key": bookmaker.get("key"),
-                "is_sharp": bookmaker.get("key") in SHARP_BOOKS,
+                "title": bookmaker.get("title") or key,
+                "key": key,
+                "is_sharp": bool(key) and key.lower() in SHARP_BOOKS,
                 "last_update": market.get("last_update"),
                 "outcomes": outcome_values,
             }
@@ -2,6 +2,7 @@
 from .core import (
     SHARP_BOOKS,
     UserLine,
+    analyze_batch,
     analyze_user_lines,
     american_to_implied_prob,
     compute_sharp_consensus,
@@ -20,6 +21,7 @@ from .core import (
 __all__ = [
     "SHARP_BOOKS",
     "UserLine",
+    "analyze_batch",
     "analyze_user_lines",
     "american_to_implied_prob",
     "compute_sharp_consensus",
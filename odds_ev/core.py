@@ -1,20 +1,38 @@
 """Core logic for odds comparison and expected value analysis."""
 from __future__ import annotations
 
-import json
-import math
+import hashlib
 import os
 import re
-from collections import Counter
+import string
+import threading
 from dataclasses import dataclass
+from functools import lru_cache
 from io import BytesIO
-from statistics import mean
-from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from operator import itemgetter
+from typing import IO, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
 
+import numpy as np
+import orjson
 import requests
 from bs4 import BeautifulSoup
+from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
+from lxml import html as lxml_html
+from lxml.etree import ParserError, XPath
+from requests.adapters import HTTPAdapter
 
-SHARP_BOOKS = {"pinnacle", "bookmaker", "circasports"}
+SHARP_BOOKS: frozenset[str] = frozenset({"pinnacle", "bookmaker", "circasports"})
+
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - numba optional for JIT-compiled math
+
+    def njit(*args, **kwargs):  # type: ignore
+        def decorator(func):
+            return func
+
+        return decorator
 
 try:
     from PIL import Image
@@ -26,8 +44,50 @@ try:  # pragma: no cover - pytesseract optional for screenshot parsing
 except ImportError:  # pragma: no cover
     pytesseract = None  # type: ignore
 
-
-@dataclass
+try:  # pragma: no cover - requests-cache optional for on-disk response caching
+    import requests_cache
+except ImportError:  # pragma: no cover
+    requests_cache = None  # type: ignore
+
+# Seconds to reuse API responses; the sports list rarely changes, odds move quickly.
+_SPORTS_TTL = 3600
+_EVENTS_TTL = 60
+_ODDS_TTL = 30
+
+
+def _request_cache_key(request: object, ignored_parameters: object = None, **kwargs: object) -> str:
+    # apiKey stays in the (hashed) key so accounts never share entries, but is
+    # still listed in ignored_parameters so it is redacted from the stored responses.
+    return requests_cache.create_key(request, **kwargs)
+
+
+# Shared session so repeated API calls reuse pooled TLS/keep-alive connections.
+# With requests-cache installed, responses also persist across CLI runs.
+if requests_cache is not None:
+    # Stored in the user cache directory unless ODDS_EV_CACHE_PATH points elsewhere
+    _CACHE_PATH = os.environ.get("ODDS_EV_CACHE_PATH")
+    _SESSION = requests_cache.CachedSession(
+        _CACHE_PATH or "odds_cache",
+        use_cache_dir=_CACHE_PATH is None,
+        allowable_methods=("GET",),
+        ignored_parameters=["apiKey"],
+        key_fn=_request_cache_key,
+        urls_expire_after={
+            "api.the-odds-api.com/v4/sports/*/odds": _ODDS_TTL,
+            "api.the-odds-api.com/v4/sports/*/events": _EVENTS_TTL,
+            "api.the-odds-api.com/v4/sports": _SPORTS_TTL,
+        },
+    )
+else:
+    _SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
+
+_SPORTS_CACHE: TTLCache = TTLCache(maxsize=128, ttl=_SPORTS_TTL)
+_EVENTS_CACHE: TTLCache = TTLCache(maxsize=128, ttl=_EVENTS_TTL)
+_ODDS_CACHE: TTLCache = TTLCache(maxsize=128, ttl=_ODDS_TTL)
+
+
+@dataclass(slots=True, frozen=True)
 class UserLine:
     """Representation of a betting line from the user's sportsbook."""
 
@@ -40,6 +100,7 @@ class UserLine:
         return self.label, self.odds
 
 
+@njit(cache=True, fastmath=True)
 def american_to_implied_prob(odds: float) -> float:
     """Convert American odds to implied probability."""
     if odds > 0:
@@ -47,6 +108,7 @@ def american_to_implied_prob(odds: float) -> float:
     return -odds / (-odds + 100.0)
 
 
+@njit(cache=True, fastmath=True)
 def american_to_decimal(odds: float) -> float:
     """Convert American odds to decimal format."""
     if odds > 0:
@@ -54,6 +116,7 @@ def american_to_decimal(odds: float) -> float:
     return 1.0 + 100.0 / -odds
 
 
+@njit(cache=True, fastmath=True)
 def probability_to_american(prob: float) -> float:
     """Convert a probability to American odds."""
     if prob <= 0 or prob >= 1:
@@ -63,6 +126,7 @@ def probability_to_american(prob: float) -> float:
     return round(-100.0 * prob / (1.0 - prob), 0)
 
 
+@njit(cache=True, fastmath=True)
 def vig_free_probabilities(price_a: float, price_b: float) -> Tuple[float, float]:
     """Return vig-free probabilities for two outcomes."""
     p_a = american_to_implied_prob(price_a)
@@ -71,6 +135,7 @@ def vig_free_probabilities(price_a: float, price_b: float) -> Tuple[float, float
     return p_a / total, p_b / total
 
 
+@njit(cache=True, fastmath=True)
 def expected_value(true_prob: float, odds: float, stake: float) -> float:
     """Expected value of a bet with a given true probability and odds."""
     if odds > 0:
@@ -80,6 +145,7 @@ def expected_value(true_prob: float, odds: float, stake: float) -> float:
     return true_prob * profit - (1 - true_prob) * stake
 
 
+@njit(cache=True, fastmath=True)
 def kelly_fraction(true_prob: float, odds: float) -> float:
     """Fraction of bankroll suggested by the Kelly criterion."""
     decimal_odds = american_to_decimal(odds)
@@ -92,12 +158,30 @@ def kelly_fraction(true_prob: float, odds: float) -> float:
     return max(0.0, fraction)
 
 
+@njit(cache=True, fastmath=True)
+def analyze_batch(
+    odds: np.ndarray, probs: np.ndarray, stake: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Expected value and Kelly fraction for each pair of odds and true probability."""
+    n = odds.shape[0]
+    ev_out = np.empty(n, dtype=np.float64)
+    kelly_out = np.empty(n, dtype=np.float64)
+    for i in range(n):
+        ev_out[i] = expected_value(probs[i], odds[i], stake)
+        kelly_out[i] = kelly_fraction(probs[i], odds[i])
+    return ev_out, kelly_out
+
+
+_ASCII_LETTERS = frozenset(string.ascii_lowercase)
+
+
+@lru_cache(maxsize=1024)
 def _canonicalize_team(name: str) -> str:
-    return re.sub(r"[^a-z]", "", name.lower())
+    return "".join(filter(_ASCII_LETTERS.__contains__, name.lower()))
 
 
-def _parse_lines_from_json_text(text: str) -> List[UserLine]:
-    data = json.loads(text)
+def _parse_lines_from_json_text(text: Union[str, bytes]) -> List[UserLine]:
+    data = orjson.loads(text)
     if isinstance(data, dict) and "lines" in data:
         lines_field = data["lines"]
     elif isinstance(data, list):
@@ -138,25 +222,39 @@ def _coerce_point(value: object) -> Optional[float]:
         return None
 
 
+# Compiled once; lxml's cssselect() would re-translate the selector on every call.
+_ODDS_XPATH = XPath("descendant-or-self::*[@data-odds]")
+
+
+def _select_odds_nodes(text: str) -> List[Tuple[Mapping[str, str], str]]:
+    """Return the attributes and text content of every ``data-odds`` element."""
+    try:
+        tree = lxml_html.fromstring(text)
+    except (ParserError, ValueError):
+        # lxml rejects empty documents and strings with encoding declarations
+        soup = BeautifulSoup(text, "lxml")
+        return [(node.attrs, node.text) for node in soup.select("[data-odds]")]
+    return [(node.attrib, node.text_content()) for node in _ODDS_XPATH(tree)]
+
+
 def _parse_lines_from_html_text(text: str) -> List[UserLine]:
-    soup = BeautifulSoup(text, "html.parser")
     lines: List[UserLine] = []
-    for node in soup.select("[data-odds]"):
+    for attrs, node_text in _select_odds_nodes(text):
         label = (
-            node.get("data-team")
-            or node.get("data-selection")
-            or node.get("data-name")
-            or node.get("aria-label")
-            or node.text.strip()
+            attrs.get("data-team")
+            or attrs.get("data-selection")
+            or attrs.get("data-name")
+            or attrs.get("aria-label")
+            or node_text.strip()
         )
-        odds = node.get("data-odds")
+        odds = attrs.get("data-odds")
         if not label or odds is None:
             continue
         try:
             odds_value = float(odds)
         except ValueError:
             continue
-        point = node.get("data-point")
+        point = attrs.get("data-point")
         point_value = _coerce_point(point)
         lines.append(UserLine(label=label.strip(), odds=odds_value, point=point_value))
     if not lines:
@@ -166,43 +264,87 @@ def _parse_lines_from_html_text(text: str) -> List[UserLine]:
     return lines
 
 
+# Label must start at a word boundary (or an opening quote) and is bounded to keep backtracking cheap.
+_ODDS_RE = re.compile(r"(?<![A-Za-z0-9'])(['A-Za-z0-9][A-Za-z0-9 .&'/-]{2,40}?)\s*([+-]\d{2,4})")
+
+
 def _parse_lines_from_text(text: str) -> List[UserLine]:
-    pattern = re.compile(r"([A-Za-z0-9 .&'/-]{3,}?)\s*([+-]\d{2,4})")
+    # Skip duplicates as they are found, preserving order
+    seen: set[Tuple[str, float]] = set()
     lines: List[UserLine] = []
     for raw_line in text.splitlines():
         raw_line = raw_line.strip()
         if not raw_line:
             continue
-        matches = list(pattern.finditer(raw_line))
-        for match in matches:
-            label = match.group(1).strip()
-            odds_str = match.group(2)
+        for label, odds_str in _ODDS_RE.findall(raw_line):
+            label = label.strip()
+            if len(label) <= 2:
+                continue
             try:
                 odds_value = float(odds_str)
             except ValueError:
                 continue
-            if len(label) <= 2:
+            key = (label.lower(), odds_value)
+            if key in seen:
                 continue
+            seen.add(key)
             lines.append(UserLine(label=label, odds=odds_value, raw_source=raw_line))
-    # Remove potential duplicates while preserving order
-    unique: Dict[Tuple[str, float], UserLine] = {}
-    for line in lines:
-        key = (line.label.lower(), line.odds)
-        if key not in unique:
-            unique[key] = line
-    if not unique:
+    if not lines:
         raise ValueError("Unable to extract odds from the provided text")
-    return list(unique.values())
+    return lines
 
 
-def parse_lines_from_image_bytes(data: bytes) -> Tuple[List[UserLine], str]:
+# Longest image edge passed to Tesseract; larger screenshots only add OCR time.
+_OCR_MAX_EDGE = 2000
+# pytesseract shlex-splits the config, so the whitelist is double-quoted to keep the apostrophe and space
+_TESSERACT_CONFIG = (
+    "--oem 1 --psm 6 -c tessedit_char_whitelist="
+    "\"0123456789+-.&'/ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz \""
+)
+
+
+def _otsu_threshold(pixels: np.ndarray) -> Optional[int]:
+    """Return the grayscale threshold that maximizes between-class variance.
+
+    Returns ``None`` for a single-tone image, where no threshold separates two classes.
+    """
+    hist = np.bincount(pixels.ravel(), minlength=256).astype(np.float64)
+    levels = np.arange(256, dtype=np.float64)
+    weight_bg = np.cumsum(hist)
+    weight_fg = weight_bg[-1] - weight_bg
+    sum_bg = np.cumsum(hist * levels)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_bg = sum_bg / weight_bg
+        mean_fg = (sum_bg[-1] - sum_bg) / weight_fg
+        variance = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    if np.all(np.isnan(variance)):
+        return None
+    return int(np.nanargmax(variance))
+
+
+def _prepare_for_ocr(img: Image.Image) -> Image.Image:
+    """Downscale and binarize a grayscale screenshot to speed up Tesseract."""
+    scale = min(1.0, _OCR_MAX_EDGE / max(img.size))
+    if scale < 1.0:
+        width, height = img.size
+        img = img.resize((int(width * scale), int(height * scale)), Image.LANCZOS)
+    pixels = np.asarray(img)
+    threshold = _otsu_threshold(pixels)
+    if threshold is None:
+        return img
+    return Image.fromarray(np.where(pixels > threshold, 255, 0).astype(np.uint8))
+
+
+def parse_lines_from_image_bytes(data: Union[bytes, IO[bytes]]) -> Tuple[List[UserLine], str]:
     if Image is None or pytesseract is None:
         raise RuntimeError(
             "Screenshot parsing requires Pillow and pytesseract with the Tesseract OCR binary installed."
         )
-    with Image.open(BytesIO(data)) as img:
-        grayscale = img.convert("L")
-        text = pytesseract.image_to_string(grayscale)
+    # File-like sources are handed straight to Pillow so it can decode lazily
+    source = BytesIO(data) if isinstance(data, (bytes, bytearray)) else data
+    with Image.open(source) as img:
+        grayscale = _prepare_for_ocr(img.convert("L"))
+        text = pytesseract.image_to_string(grayscale, config=_TESSERACT_CONFIG)
     lines = _parse_lines_from_text(text)
     return lines, text
 
@@ -217,7 +359,7 @@ def parse_lines_from_path(path: str) -> List[UserLine]:
 def parse_lines_from_bytes(data: bytes, extension: str) -> List[UserLine]:
     extension = extension.lower()
     if extension == ".json":
-        return _parse_lines_from_json_text(data.decode("utf-8"))
+        return _parse_lines_from_json_text(data)
     if extension in {".html", ".htm"}:
         return _parse_lines_from_html_text(data.decode("utf-8", errors="ignore"))
     if extension in {".png", ".jpg", ".jpeg", ".webp", ".bmp", ".gif"}:
@@ -226,37 +368,58 @@ def parse_lines_from_bytes(data: bytes, extension: str) -> List[UserLine]:
     raise ValueError("Unsupported file format. Use JSON, HTML, or an image screenshot.")
 
 
-def parse_lines_from_upload(filename: str, data: bytes) -> Tuple[List[UserLine], Optional[str]]:
+def parse_lines_from_upload(
+    filename: str, data: Union[bytes, IO[bytes]]
+) -> Tuple[List[UserLine], Optional[str]]:
     extension = os.path.splitext(filename)[1].lower()
     if extension in {".png", ".jpg", ".jpeg", ".webp", ".bmp", ".gif"}:
         lines, text = parse_lines_from_image_bytes(data)
         return lines, text
+    if not isinstance(data, (bytes, bytearray)):
+        data = data.read()
     lines = parse_lines_from_bytes(data, extension)
     return lines, None
 
 
+def _api_cache_key(api_key: str, *args: str, **kwargs: str) -> Tuple[object, ...]:
+    # Key on a digest so the raw API key is never held by the cache.
+    digest = hashlib.blake2b(api_key.encode("utf-8"), digest_size=16).hexdigest()
+    return hashkey(digest, *args, **kwargs)
+
+
+def _memoize(cache: TTLCache):
+    # Stacking the in-memory cache on top of requests-cache would restart the TTL
+    # on responses already aged on disk, so use only one layer.
+    if requests_cache is not None:
+        return lambda func: func
+    return cached(cache, key=_api_cache_key, lock=threading.Lock())
+
+
+@_memoize(_SPORTS_CACHE)
 def fetch_sports(api_key: str) -> List[Dict[str, str]]:
     url = "https://api.the-odds-api.com/v4/sports/"
     params = {"apiKey": api_key}
-    resp = requests.get(url, params=params, timeout=10)
+    resp = _SESSION.get(url, params=params, timeout=10)
     resp.raise_for_status()
-    sports = resp.json()
+    sports = orjson.loads(resp.content)
     if not isinstance(sports, list):
         raise RuntimeError("Unexpected response when fetching sports list")
     return sports
 
 
+@_memoize(_EVENTS_CACHE)
 def fetch_events(api_key: str, sport: str) -> List[Dict[str, object]]:
     url = f"https://api.the-odds-api.com/v4/sports/{sport}/events/"
     params = {"apiKey": api_key}
-    resp = requests.get(url, params=params, timeout=10)
+    resp = _SESSION.get(url, params=params, timeout=10)
     resp.raise_for_status()
-    events = resp.json()
+    events = orjson.loads(resp.content)
     if not isinstance(events, list):
         raise RuntimeError("Unexpected response when fetching events")
     return events
 
 
+@_memoize(_ODDS_CACHE)
 def fetch_event_with_market(
     api_key: str, sport: str, event_id: str, market: str
 ) -> Dict[str, object]:
@@ -268,9 +431,9 @@ def fetch_event_with_market(
         "eventIds": event_id,
         "oddsFormat": "american",
     }
-    resp = requests.get(url, params=params, timeout=10)
+    resp = _SESSION.get(url, params=params, timeout=10)
     resp.raise_for_status()
-    events = resp.json()
+    events = orjson.loads(resp.content)
     if not events:
         raise RuntimeError("Event not found or no odds available")
     return events[0]
@@ -318,7 +481,9 @@ def compute_sharp_consensus(
         raise RuntimeError("Unexpected event format from API")
 
     market_list: List[Dict[str, object]] = []
-    sharp_markets: List[Dict[str, object]] = []
+    # Sharp outcome lists paired with their first point, extracted once
+    sharp_entries: List[Tuple[List[Dict[str, object]], object]] = []
+    point_counts: Dict[float, int] = {}
     for bookmaker in bookmakers:
         market_data = None
         for m in bookmaker.get("markets", []) or []:
@@ -332,46 +497,38 @@ def compute_sharp_consensus(
             "market": market_data,
         }
         market_list.append(entry)
-        if bookmaker.get("key") in SHARP_BOOKS:
-            sharp_markets.append(entry)
+        key = bookmaker.get("key")
+        if key and key.lower() in SHARP_BOOKS:
+            outcomes = market_data.get("outcomes", []) or []
+            first_point = outcomes[0].get("point") if outcomes else None
+            sharp_entries.append((outcomes, first_point))
+            if isinstance(first_point, (int, float)):
+                # Round to avoid floating precision inconsistencies
+                rounded = round(float(first_point), 2)
+                point_counts[rounded] = point_counts.get(rounded, 0) + 1
 
-    if not sharp_markets:
+    if not sharp_entries:
         raise RuntimeError("No sharp bookmaker data available for this event")
 
     consensus_point: Optional[float] = None
-    if market in {"spreads", "totals"}:
-        point_counts: Counter[float] = Counter()
-        for entry in sharp_markets:
-            outcomes = entry["market"].get("outcomes", []) or []
-            if not outcomes:
-                continue
-            point = outcomes[0].get("point")
-            if isinstance(point, (int, float)):
-                # Round to avoid floating precision inconsistencies
-                point_counts[round(float(point), 2)] += 1
-        if point_counts:
-            consensus_point = point_counts.most_common(1)[0][0]
+    if market in {"spreads", "totals"} and point_counts:
+        # max() keeps the first-seen point on ties, as most_common(1) did
+        consensus_point = max(point_counts, key=point_counts.__getitem__)
+
+    if consensus_point is None:
+        filtered_entries = [outcomes for outcomes, _ in sharp_entries]
+    else:
+        filtered_entries = [
+            outcomes
+            for outcomes, point in sharp_entries
+            if point is not None and abs(float(point) - consensus_point) <= 0.05
+        ]
+        if not filtered_entries:
+            filtered_entries = [outcomes for outcomes, _ in sharp_entries]
 
     outcome_prices: Dict[str, List[float]] = {}
     outcome_points: Dict[str, List[float]] = {}
-
-    def include_entry(entry: Dict[str, object]) -> bool:
-        if consensus_point is None:
-            return True
-        outcomes = entry["market"].get("outcomes", []) or []
-        if not outcomes:
-            return False
-        point = outcomes[0].get("point")
-        if point is None:
-            return False
-        return math.isclose(float(point), float(consensus_point), abs_tol=0.05)
-
-    filtered_entries = [entry for entry in sharp_markets if include_entry(entry)]
-    if not filtered_entries:
-        filtered_entries = sharp_markets
-
-    for entry in filtered_entries:
-        outcomes = entry["market"].get("outcomes", []) or []
+    for outcomes in filtered_entries:
         for outcome in outcomes:
             name = str(outcome.get("name"))
             price = outcome.get("price")
@@ -399,10 +556,10 @@ def compute_sharp_consensus(
         prices = outcome_prices.get(name, [])
         if not prices:
             continue
-        avg_price = mean(prices)
+        avg_price = sum(prices) / len(prices)
         avg_prices.append(avg_price)
         points = outcome_points.get(name, [])
-        point_value = mean(points) if points else consensus_point
+        point_value = sum(points) / len(points) if points else consensus_point
         consensus_outcomes.append(
             {
                 "name": name,
@@ -430,26 +587,37 @@ def compute_sharp_consensus(
     }
 
 
+CanonicalOutcome = Tuple[Dict[str, object], str, str]
+
+
+def canonicalize_outcomes(outcomes: Iterable[Dict[str, object]]) -> List[CanonicalOutcome]:
+    """Pair each outcome with its canonical and lower-cased name for matching."""
+    return [
+        (outcome, _canonicalize_team(str(outcome["name"])), str(outcome["name"]).lower())
+        for outcome in outcomes
+    ]
+
+
 def match_line_to_outcome(
-    line: UserLine, outcomes: Sequence[Dict[str, object]], market: str
+    line: UserLine, canonical_outcomes: Sequence[CanonicalOutcome], market: str
 ) -> Tuple[Optional[Dict[str, object]], str]:
     if market == "totals":
         label = line.label.lower()
         if "over" in label:
-            for outcome in outcomes:
-                if outcome["name"].lower().startswith("over"):
+            for outcome, _, lowered in canonical_outcomes:
+                if lowered.startswith("over"):
                     return outcome, "matched by keyword"
         if "under" in label:
-            for outcome in outcomes:
-                if outcome["name"].lower().startswith("under"):
+            for outcome, _, lowered in canonical_outcomes:
+                if lowered.startswith("under"):
                     return outcome, "matched by keyword"
     canonical_label = _canonicalize_team(line.label)
     if canonical_label:
-        for outcome in outcomes:
-            if _canonicalize_team(str(outcome["name"])) == canonical_label:
+        for outcome, canonical_name, _ in canonical_outcomes:
+            if canonical_name == canonical_label:
                 return outcome, "matched by name"
-        for outcome in outcomes:
-            if canonical_label in _canonicalize_team(str(outcome["name"])):
+        for outcome, canonical_name, _ in canonical_outcomes:
+            if canonical_label in canonical_name:
                 return outcome, "matched by partial name"
     return None, "no match"
 
@@ -464,12 +632,16 @@ def analyze_user_lines(
     outcomes = list(consensus.get("outcomes", []))
     market = str(consensus.get("market", ""))
     consensus_point = consensus.get("consensus_point")
+    consensus_point_value = float(consensus_point) if consensus_point is not None else None
     used_outcomes: set[str] = set()
-    results: List[Dict[str, object]] = []
+    # (expected value, result) pairs so sorting never touches the dicts
+    ranked: List[Tuple[float, Dict[str, object]]] = []
     warnings: List[str] = []
 
-    for idx, line in enumerate(lines):
-        outcome, reason = match_line_to_outcome(line, outcomes, market)
+    canonical_outcomes = canonicalize_outcomes(outcomes)
+    matches: List[Tuple[UserLine, Optional[Dict[str, object]], str]] = []
+    for line in lines:
+        outcome, reason = match_line_to_outcome(line, canonical_outcomes, market)
         if outcome and outcome["name"] in used_outcomes:
             outcome = None
             reason = "outcome already matched"
@@ -479,25 +651,45 @@ def analyze_user_lines(
             if len(remaining) == 1 and len(lines) == 2:
                 outcome = remaining[0]
                 reason = "assigned remaining outcome"
+        if outcome is not None:
+            used_outcomes.add(outcome["name"])
+        matches.append((line, outcome, reason))
+
+    matched = [(line, outcome) for line, outcome, _ in matches if outcome is not None]
+    for line, _ in matched:
+        # Checked here so the error is raised in Python rather than inside the kernel
+        if line.odds == 0:
+            raise ValueError(f"Line '{line.label}' has odds of 0, which are not valid American odds.")
+    ev_values, kelly_values = analyze_batch(
+        np.array([line.odds for line, _ in matched], dtype=np.float64),
+        np.array([float(outcome.get("true_prob", 0.0)) for _, outcome in matched], dtype=np.float64),
+        float(stake),
+    )
+
+    matched_idx = 0
+    for line, outcome, reason in matches:
         if outcome is None:
             warnings.append(
                 f"Could not match '{line.label}' to a market outcome; please adjust the label."
             )
-            results.append(
-                {
-                    "label": line.label,
-                    "odds": line.odds,
-                    "status": "unmatched",
-                    "message": reason,
-                }
+            ranked.append(
+                (
+                    float("-inf"),
+                    {
+                        "label": line.label,
+                        "odds": line.odds,
+                        "status": "unmatched",
+                        "message": reason,
+                    },
+                )
             )
             continue
 
-        used_outcomes.add(outcome["name"])
         true_prob = float(outcome.get("true_prob", 0.0))
         fair_price = outcome.get("fair_price")
-        ev = expected_value(true_prob, line.odds, stake)
-        base_kelly = kelly_fraction(true_prob, line.odds)
+        ev = float(ev_values[matched_idx])
+        base_kelly = float(kelly_values[matched_idx])
+        matched_idx += 1
         recommended_fraction = max(0.0, base_kelly * max(0.0, fractional_kelly))
         recommended_bet = bankroll * recommended_fraction
         result = {
@@ -517,13 +709,14 @@ def analyze_user_lines(
         }
         if line.point is not None:
             result["user_point"] = line.point
-            if consensus_point is not None and not math.isclose(
-                float(line.point), float(consensus_point), abs_tol=0.25
+            if (
+                consensus_point_value is not None
+                and abs(float(line.point) - consensus_point_value) > 0.25
             ):
                 warnings.append(
                     f"Line '{line.label}' uses point {line.point}, which differs from the consensus {consensus_point}."
                 )
-        results.append(result)
+        ranked.append((ev, result))
 
-    results.sort(key=lambda item: item.get("expected_value", float("-inf")), reverse=True)
-    return results, warnings
+    ranked.sort(key=itemgetter(0), reverse=True)
+    return [result for _, result in ranked], warnings
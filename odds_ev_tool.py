@@ -5,7 +5,8 @@ from __future__ import annotations
 
 import argparse
 import os
-from typing import Sequence
+import sys
+from typing import Sequence, Tuple
 
 from odds_ev import (
     UserLine,
@@ -61,14 +62,48 @@ def analyze_file(
             print(f"Warning: {warning}")
 
 
+def batch_analyze(
+    jobs: Sequence[Tuple[str, str]],
+    api_key: str,
+    sport: str,
+    market: str = "spreads",
+    stake: float = 100.0,
+) -> int:
+    """Analyze several (file, event id) pairs in one process, sharing the API session.
+
+    A failing pair is reported and skipped; returns the number of failures.
+    """
+    failures = 0
+    for idx, (file_path, event_id) in enumerate(jobs):
+        if len(jobs) > 1:
+            if idx:
+                print()
+            print(f"== {file_path} (event {event_id})")
+        try:
+            analyze_file(file_path, api_key, sport, event_id, market, stake)
+        except Exception as exc:
+            failures += 1
+            print(f"Error: could not analyze {file_path}: {exc}", file=sys.stderr)
+    return failures
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Compute expected value for your sportsbook odds",
     )
-    parser.add_argument("file", help="Path to your sportsbook odds file (HTML/JSON/image)")
+    parser.add_argument(
+        "file",
+        nargs="+",
+        help="Path to your sportsbook odds file (HTML/JSON/image); repeat to analyze a slate",
+    )
     parser.add_argument("--api-key", dest="api_key", help="The Odds API key")
     parser.add_argument("--sport", default="americanfootball_nfl", help="Sport key for the event")
-    parser.add_argument("--event", required=True, help="Event identifier from The Odds API")
+    parser.add_argument(
+        "--event",
+        action="append",
+        required=True,
+        help="Event identifier from The Odds API; repeat once per file, in file order",
+    )
     parser.add_argument(
         "--market",
         choices=["h2h", "spreads", "totals"],
@@ -81,7 +116,10 @@ def parse_args() -> argparse.Namespace:
         default=100.0,
         help="Stake amount used when computing expected value",
     )
-    return parser.parse_args()
+    args = parser.parse_intermixed_args()
+    if len(args.file) != len(args.event):
+        parser.error("Provide one --event identifier for each file")
+    return args
 
 
 def main() -> None:
@@ -89,7 +127,9 @@ def main() -> None:
     api_key = args.api_key or os.environ.get("THE_ODDS_API_KEY")
     if not api_key:
         raise SystemExit("Provide an API key via --api-key or THE_ODDS_API_KEY")
-    analyze_file(args.file, api_key, args.sport, args.event, args.market, args.stake)
+    jobs = list(zip(args.file, args.event))
+    if batch_analyze(jobs, api_key, args.sport, args.market, args.stake):
+        raise SystemExit(1)
 
 
 if __name__ == "__main__":
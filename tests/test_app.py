@@ -0,0 +1,39 @@
+import unittest
+from unittest import mock
+
+import app as app_module
+
+
+class StreamedAnalysisFlashTests(unittest.TestCase):
+    def setUp(self):
+        app_module.app.config["TESTING"] = True
+        self.client = app_module.app.test_client()
+        event = {"id": "E1", "home_team": "Team A", "away_team": "Team B", "bookmakers": []}
+        for name, value in (
+            ("fetch_sports", []),
+            ("fetch_events", []),
+            ("fetch_event_with_market", event),
+        ):
+            patcher = mock.patch.object(app_module, name, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_streamed_post_consumes_flashes(self):
+        response = self.client.post(
+            "/",
+            data={
+                "api_key": "key",
+                "event_id": "E1",
+                "line_name[]": ["Team A", "Team B", "Team C"],
+                "line_odds[]": ["-110", "+100", "abc"],
+                "line_point[]": ["", "", ""],
+            },
+        )
+        self.assertIn("invalid odds", response.get_data(as_text=True))
+        with self.client.session_transaction() as session:
+            self.assertNotIn("_flashes", session)
+        self.assertNotIn("invalid odds", self.client.get("/").get_data(as_text=True))
+
+
+if __name__ == "__main__":
+    unittest.main()